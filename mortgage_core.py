@@ -0,0 +1,201 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from functools import lru_cache
+
+
+# -------------------------------
+# Monthly P&I Payment (end-of-period annuity)
+# -------------------------------
+@lru_cache(maxsize=256)
+def pmt(rate, nper, pv):
+    c = (1 + rate) ** nper
+    return (pv * rate * c) / (c - 1) if rate else pv / nper
+
+# -------------------------------
+# Validate Inputs - Show No Scenario if invalid
+# -------------------------------
+def valid_loan(loan_amount, monthly_payment, max_monthly, total_cash, down_payment, home_price, pmi_rate):
+    if loan_amount <= 0:
+        return False
+    pmi = (loan_amount * pmi_rate) / 12 if loan_amount > 0.80 * home_price else 0
+    total_monthly = monthly_payment + pmi
+    if total_monthly > max_monthly or total_monthly <= 0:
+        return False
+    if down_payment > total_cash:
+        return False
+    return True
+
+# -------------------------------
+# Loan Schedules with PMI logic (one row per loan, all loans in one pass)
+# -------------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_schedule_arrays(loan_amounts, annual_rates, term_years, home_price, start_year=0, pmi_rate=0, extra_costs=0):
+    loan_amounts = np.asarray(loan_amounts, dtype=float).reshape(-1, 1)
+    monthly_rates = np.asarray(annual_rates, dtype=float).reshape(-1, 1) / 12
+    months = term_years * 12
+    shape = (len(loan_amounts), months)
+    max_ltv = 0.80
+
+    # Closed-form balance after each month instead of stepping month by month.
+    # annuity = ((1 + r)^m - 1) / r, which is just m for a zero rate.
+    m = np.arange(1, months + 1)
+    growth = (1 + monthly_rates) ** m
+    annuity = np.divide(growth - 1, monthly_rates, out=np.broadcast_to(m, shape).astype(float), where=monthly_rates != 0)
+    payment = loan_amounts * growth[:, -1:] / annuity[:, -1:]
+    balance = loan_amounts * growth - payment * annuity
+
+    interest = np.empty(shape)
+    interest[:, :1] = loan_amounts * monthly_rates
+    interest[:, 1:] = balance[:, :-1] * monthly_rates
+    principal = payment - interest
+    total_interest = np.cumsum(interest, axis=1)
+
+    # The balance falls monotonically, so PMI runs for a leading block of months
+    # ending where the balance first drops to the 80% LTV cutoff. Solve for that
+    # crossing month directly instead of testing the LTV every month.
+    base_pmi = loan_amounts * pmi_rate / 12
+    pmi_cutoff = max_ltv * home_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pay_over_rate = payment / monthly_rates
+        crossing = np.where(
+            monthly_rates != 0,
+            np.log((pay_over_rate - pmi_cutoff) / (pay_over_rate - loan_amounts)) / np.log1p(monthly_rates),
+            (loan_amounts - pmi_cutoff) / payment
+        )
+    crossing = np.where(loan_amounts > pmi_cutoff, crossing, 0.0)
+    pmi_months = np.clip(np.ceil(crossing) - 1, 0, months).astype(int)
+    current_pmi = np.where(m <= pmi_months, base_pmi, 0.0)
+    total_payment = payment + current_pmi
+
+    extra = np.zeros(shape)
+    extra[:, 0] = extra_costs
+
+    # All math above runs in float64. Per-month amounts are stored as float32,
+    # which still holds cents exactly at these magnitudes; balances and running
+    # totals reach six figures and stay float64 so they keep cent accuracy.
+    columns = {
+        "Month": np.broadcast_to(m.astype(np.int16), shape),
+        "Year": np.broadcast_to((start_year + (m - 1) // 12).astype(np.int16), shape),
+        "Payment": np.broadcast_to(payment.astype(np.float32), shape),
+        "Principal": principal.astype(np.float32),
+        "Interest": interest.astype(np.float32),
+        "Total Payment": total_payment.astype(np.float32),
+        "Balance": np.maximum(balance, 0),
+        "Total Interest Paid": total_interest,
+        "PMI": current_pmi.astype(np.float32),
+        "Extra Costs": extra
+    }
+    info = {
+        "pmi_months": pmi_months[:, 0],
+        "base_pmi": base_pmi[:, 0]
+    }
+    return columns, info
+
+def split_schedules(schedules):
+    n_loans = len(next(iter(schedules.values())))
+    return [{key: values[i] for key, values in schedules.items()} for i in range(n_loans)]
+
+# -------------------------------
+# Year-End Summary straight from the schedule arrays
+# -------------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def summarize_arrays(arrays, years=(1, 2, 3, 4, 5, 10, 15, 20, 25, 30)):
+    months = len(arrays["Month"])
+    cum_payment = np.cumsum(arrays["Total Payment"], dtype=np.float64)
+    cum_interest = np.cumsum(arrays["Interest"], dtype=np.float64)
+
+    # Years past the end of the term report the final (paid off) figures
+    end_idx = np.minimum(12 * np.asarray(years), months) - 1
+    return pd.DataFrame({
+        "Year": [f"{yr} Years" for yr in years],
+        "Total Payment": cum_payment[end_idx],
+        "Total Interest": cum_interest[end_idx],
+        "Remaining Balance": arrays["Balance"][end_idx]
+    })
+
+# -------------------------------
+# Loan A Search (largest down payment, fewest points within budget)
+# -------------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def find_best_loan_a(home_price, max_down_pct, total_cash, max_monthly, pmi_rate, base_rate, term_years, point_rate_reduction=0.0025, max_points_allowed=20):
+    if not (home_price and max_down_pct and total_cash and max_monthly):
+        return None
+        
+    months = term_years * 12
+    max_down_payment = min(home_price * max_down_pct / 100, total_cash)
+    min_down_payment = home_price * 0.03
+    step = 1000
+    pmi_cutoff = 0.80 * home_price
+
+    top_dp = int(max_down_payment)
+    bottom_dp = int(min_down_payment)
+    if top_dp < bottom_dp:
+        return None
+
+    pts = np.arange(0, max_points_allowed + 1)
+    point_fracs = pts * 0.01
+    rates = np.maximum(base_rate - point_rate_reduction * pts, 0.02)
+    monthly_rates = rates / 12
+    c = (1 + monthly_rates) ** months
+
+    # For a fixed points level a bigger down payment only lowers the monthly
+    # cost, so the budget check can only fail at the small end. The largest
+    # feasible down payment is therefore the largest one whose points the
+    # remaining cash still covers: (home_price - dp) * points% <= total_cash - dp
+    highest_dp = np.minimum((total_cash - home_price * point_fracs) / (1 - point_fracs), top_dp)
+
+    # Snap it onto the $step grid below top_dp, then check that grid point and
+    # its neighbours exactly (cash and budget) so rounding in the bound above
+    # can never change the pick
+    grid_dp = top_dp - step * np.ceil((top_dp - highest_dp) / step).astype(int)
+    candidates = grid_dp[:, None] + step * np.array([1, 0, -1])
+    loans = home_price - candidates
+    payments = (loans * monthly_rates[:, None] * c[:, None]) / (c[:, None] - 1)
+    pmi = np.where(loans > pmi_cutoff, (loans * pmi_rate) / 12, 0.0)
+    point_costs = loans * point_fracs[:, None]
+    feasible = (
+        (candidates <= top_dp) & (candidates >= bottom_dp)
+        & (point_costs <= total_cash - candidates) & (payments + pmi <= max_monthly)
+    )
+    if not feasible.any():
+        return None
+
+    # Largest down payment wins; among equal down payments, the fewest points
+    best_dp = np.where(feasible, candidates, -np.inf).max(axis=1)
+    j = int(np.argmax(best_dp == best_dp.max()))
+    k = int(np.argmax(feasible[j] & (candidates[j] == best_dp[j])))
+    return {
+        "down_payment": int(candidates[j, k]),
+        "loan_amount": loans[j, k].item(),
+        "rate": rates[j].item(),
+        "monthly_payment": payments[j, k].item(),
+        "pmi": pmi[j, k].item(),
+        "points": int(pts[j]),
+        "extra_costs": point_costs[j, k].item()
+    }
+
+# -------------------------------
+# Loan B (minimum down payment, spare cash into discount points)
+# -------------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_loan_b(home_price, total_cash, current_market_rate, term_years, point_rate_reduction=0.0025):
+    if home_price <= 0 or total_cash < 0 or current_market_rate <= 0:
+        return None
+
+    months = term_years * 12
+    min_down_b = max(home_price * 0.0351, home_price * 0.03)
+    loan_amount = home_price - min_down_b
+    available_for_points = total_cash - min_down_b
+    point_cost = loan_amount * 0.01
+    max_points = int(available_for_points // point_cost)
+    rate = max(current_market_rate - point_rate_reduction * max_points, 0.02)
+
+    return {
+        "down_payment": min_down_b,
+        "loan_amount": loan_amount,
+        "rate": rate,
+        "monthly_payment": pmt(rate / 12, months, loan_amount),
+        "points": max_points,
+        "extra_costs": point_cost * max_points if max_points > 0 else 0
+    }